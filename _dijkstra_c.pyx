@@ -0,0 +1,160 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Compiled Dijkstra's shortest-path kernel for networks stored in CSR form.
+
+Optional, used by dijkstras_shortest_path in place of the Numba kernel when built. Build in place with:
+    cythonize -i _dijkstra_c.pyx
+"""
+from libc.math cimport INFINITY
+from libc.stdlib cimport free, malloc
+
+ctypedef fused weight_t:
+    float
+    double
+
+
+cdef inline Py_ssize_t _heap_push(double* heap_d, int* heap_v, Py_ssize_t size, double d, int v) noexcept nogil:
+    """
+    pushes a (distance, node index) entry onto a 4-ary min-heap, returning the new number of entries
+    """
+    cdef Py_ssize_t i = size
+    cdef Py_ssize_t parent
+
+    # sift up from the end of the heap until the parent is no larger than the new entry
+    while i > 0:
+        parent = (i - 1) >> 2
+        if heap_d[parent] <= d:
+            break
+        heap_d[i] = heap_d[parent]
+        heap_v[i] = heap_v[parent]
+        i = parent
+    heap_d[i] = d
+    heap_v[i] = v
+
+    return size + 1
+
+
+cdef inline void _heap_pop(double* heap_d, int* heap_v, Py_ssize_t size) noexcept nogil:
+    """
+    removes the root of a 4-ary min-heap holding size entries, leaving size-1 entries
+    """
+    cdef Py_ssize_t i = 0
+    cdef Py_ssize_t first, last, child, smallest
+    cdef double last_d
+    cdef int last_v
+
+    # sift the last entry down from the root until none of the (up to four) children is smaller
+    size -= 1
+    last_d = heap_d[size]
+    last_v = heap_v[size]
+    while True:
+        first = 4 * i + 1
+        if first >= size:
+            break
+        last = first + 4 if first + 4 < size else size
+        smallest = first
+        for child in range(first + 1, last):
+            if heap_d[child] < heap_d[smallest]:
+                smallest = child
+        if heap_d[smallest] >= last_d:
+            break
+        heap_d[i] = heap_d[smallest]
+        heap_v[i] = heap_v[smallest]
+        i = smallest
+    heap_d[i] = last_d
+    heap_v[i] = last_v
+
+
+def dijkstra_csr(const int[::1] indptr, const int[::1] indices, const weight_t[::1] weights, int src, int dst,
+                 double[::1] dist, int[::1] pred, bint validate=False):
+    """
+    performs Dijkstra's shortest-path algorithm over a network stored in compressed sparse row (CSR) form
+    ------------
+    Parameters:
+        indptr, indices, weights (ndarray):
+            CSR arrays of the out-arcs of each node, as for dijkstras_shortest_path._dijkstra_csr. weights may be
+            float64 or float32
+        src (int):
+            Index of the source node
+        dst (int):
+            Index of the destination node, the search stops once its distance is final. Pass -1 to solve every node
+        dist (ndarray):
+            Array of length V, filled with the shortest distance from the source to each node, inf for nodes that
+            were not reached
+        pred (ndarray):
+            Array of length V, filled with the index of the predecessor of each node on its shortest path. The
+            source is its own predecessor, and unreached nodes have -1
+        validate (bool):
+            If True, check that no weight is negative before searching. The heap is sized assuming this, and a
+            negative cycle would otherwise overrun it. Off by default, as Network.finalize() already checks the weights
+            and scanning them costs O(E) on every query
+    ------------
+    Raises:
+        ValueError:
+            If validate is True and any weight is negative, or the arrays do not describe the same number of nodes
+        IndexError:
+            If src or dst is not a node index
+    ------------
+    Notes:
+        The priority queue is a 4-ary min-heap with lazy deletion, which is shallower than a binary heap and
+        compares siblings that share a cache line
+    """
+    cdef Py_ssize_t n_nodes = dist.shape[0]
+    cdef Py_ssize_t capacity = indices.shape[0] + 1
+    cdef Py_ssize_t size, i, k
+    cdef double d, nd
+    cdef int u, v
+    cdef double* heap_d
+    cdef int* heap_v
+
+    # bounds checking is off, so check the shapes and indices up front
+    if indptr.shape[0] != n_nodes + 1 or pred.shape[0] != n_nodes or weights.shape[0] != indices.shape[0]:
+        raise ValueError("CSR and solution arrays do not describe the same network")
+    if not 0 <= src < n_nodes or not -1 <= dst < n_nodes:
+        raise IndexError("source or destination is not a node index")
+    if validate:
+        for k in range(weights.shape[0]):
+            if weights[k] < 0:
+                raise ValueError("arc weights must not be negative")
+
+    for i in range(n_nodes):
+        dist[i] = INFINITY
+        pred[i] = -1
+    dist[src] = 0.0
+    pred[src] = src
+
+    # at most one heap entry per successful relaxation plus the source
+    heap_d = <double*> malloc(capacity * sizeof(double))
+    heap_v = <int*> malloc(capacity * sizeof(int))
+    if heap_d == NULL or heap_v == NULL:
+        free(heap_d)
+        free(heap_v)
+        raise MemoryError()
+
+    try:
+        with nogil:
+            size = _heap_push(heap_d, heap_v, 0, 0.0, src)
+            while size > 0:
+                d = heap_d[0]
+                u = heap_v[0]
+                _heap_pop(heap_d, heap_v, size)
+                size -= 1
+
+                # skip stale entries, left behind when a shorter distance was pushed
+                if d != dist[u]:
+                    continue
+
+                # the destination's distance is final once it is popped
+                if u == dst:
+                    break
+
+                for k in range(indptr[u], indptr[u + 1]):
+                    v = indices[k]
+                    nd = d + weights[k]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        pred[v] = u
+                        size = _heap_push(heap_d, heap_v, size, nd, v)
+    finally:
+        free(heap_d)
+        free(heap_v)
@@ -1,53 +1,357 @@
 # imports
+import heapq
+import multiprocessing
+import os
+from math import inf
+from multiprocessing import shared_memory
+
 import numpy as np
 
+try:
+    from numba import njit
+    _HAVE_NUMBA = True
+except ImportError:
+    # Numba is optional, without it the kernels run as plain Python
+    _HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+try:
+    import scipy.sparse
+    import scipy.sparse.csgraph
+    _HAVE_SCIPY = True
+except ImportError:
+    # SciPy is optional, and used as the solver when neither compiled kernel is available
+    _HAVE_SCIPY = False
+
+try:
+    from _dijkstra_c import dijkstra_csr as _dijkstra_csr_c
+except ImportError:
+    # the compiled extension is optional, and is built in place with `cythonize -i _dijkstra_c.pyx`
+    _dijkstra_csr_c = None
+
+
+def _dijkstra_adj(adj, src, dst):
+    """
+    performs Dijkstra's shortest-path algorithm over a network stored as tuples of (node index, weight) pairs, for
+    use when Numba is not installed
+    ------------
+    Parameters:
+        adj (tuple):
+            For each node, a tuple of (node index, weight) pairs, one for each arc departing the node
+        src (int):
+            Index of the source node
+        dst (int):
+            Index of the destination node, the search stops once its distance is final. Pass -1 to solve every node
+    ------------
+    Return:
+        dist (list):
+            Shortest distance from the source to each node, inf for nodes that were not reached
+        pred (list):
+            Index of the predecessor of each node on its shortest path. The source is its own predecessor, and
+            unreached nodes have -1
+    ------------
+    Notes:
+        Plain Python is much faster over lists, tuples and heapq than over NumPy arrays, whose elements are boxed
+        on every access
+    """
+    dist = [inf] * len(adj)
+    pred = [-1] * len(adj)
+    dist[src] = 0.0
+    pred[src] = src
+
+    # priority queue of (distance, node index) tuples, with stale entries skipped when popped
+    heap = [(0.0, src)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d != dist[u]:
+            continue
+
+        # the destination's distance is final once it is popped
+        if u == dst:
+            break
+
+        for v, w in adj[u]:
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+
+    return dist, pred
 
-def spath_iteration(network, unvisited):
+
+@njit('int64(float64[::1], int32[::1], int64, float64, int32)', cache=True)
+def _heap_push(heap_d, heap_v, size, d, v):
     """
-    performs one iteration of the shortest-path algorithm
+    pushes a (distance, node index) entry onto a binary min-heap held in a pair of arrays
     ------------
     Parameters:
-        network (Network object):
-            An object that belongs to the network class
-        unvisited (set):
-            The set containing the names of all currently unsolved nodes in the network
+        heap_d (ndarray):
+            Distances of the heap entries
+        heap_v (ndarray):
+            Node indices of the heap entries
+        size (int):
+            Number of entries currently in the heap
+        d (float):
+            Distance of the new entry
+        v (int):
+            Node index of the new entry
     ------------
     Return:
-        solved_name (string or None):
-            Name of the node that is solved on the iteration and therefore moved from the unvisited set. If no node can
-            be solved, return None
+        size (int):
+            Number of entries in the heap after the push
     """
-    # find the node in unvisited set with the smallest distance to become the solved node for this iteration
-    while len(unvisited) != 0:
-        # checks to return None if no node can be solved
-        try:
-            solved_name = min(unvisited, key=lambda node: network.get_node(node).value[0])
-        except ValueError:
-            return None
+    # sift up from the end of the heap until the parent is no larger than the new entry
+    i = size
+    while i > 0:
+        parent = (i - 1) // 2
+        if heap_d[parent] <= d:
+            break
+        heap_d[i] = heap_d[parent]
+        heap_v[i] = heap_v[parent]
+        i = parent
+    heap_d[i] = d
+    heap_v[i] = v
 
-        # removal of the solved node from the unvisited set
-        unvisited.discard(solved_name)
+    return size + 1
 
-        # init
-        solved_node = network.get_node(solved_name)
 
-        # finding all the outwardly connected nodes from the solved node
-        for arc in solved_node.arcs_out:
-            # temporarily storing arc weight, current outwardly connected node and the predecessor node
-            temp_weight = arc.weight
-            temp_predecessor = arc.from_node
-            temp_node = arc.to_node
+@njit('Tuple((float64, int32))(float64[::1], int32[::1], int64)', cache=True)
+def _heap_pop(heap_d, heap_v, size):
+    """
+    removes the smallest (distance, node index) entry from a binary min-heap held in a pair of arrays
+    ------------
+    Parameters:
+        heap_d (ndarray):
+            Distances of the heap entries
+        heap_v (ndarray):
+            Node indices of the heap entries
+        size (int):
+            Number of entries currently in the heap, must be at least one. The heap holds size-1 entries afterwards
+    ------------
+    Return:
+        d (float):
+            Distance of the removed entry
+        v (int):
+            Node index of the removed entry
+    """
+    d = heap_d[0]
+    v = heap_v[0]
+
+    # sift the last entry down from the root until neither child is smaller
+    size -= 1
+    last_d = heap_d[size]
+    last_v = heap_v[size]
+    i = 0
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap_d[child + 1] < heap_d[child]:
+            child += 1
+        if heap_d[child] >= last_d:
+            break
+        heap_d[i] = heap_d[child]
+        heap_v[i] = heap_v[child]
+        i = child
+    heap_d[i] = last_d
+    heap_v[i] = last_v
+
+    return d, v
+
+
+@njit(['void(int32[::1], int32[::1], float64[::1], int32, int32, float64[::1], int32[::1])',
+       'void(int32[::1], int32[::1], float32[::1], int32, int32, float64[::1], int32[::1])'], cache=True)
+def _dijkstra_csr(indptr, indices, weights, src, dst, dist, pred):
+    """
+    performs Dijkstra's shortest-path algorithm over a network stored in compressed sparse row (CSR) form
+    ------------
+    Parameters:
+        indptr (ndarray):
+            Array of length V+1, the out-arcs of node i are stored at positions indptr[i] to indptr[i+1]-1
+        indices (ndarray):
+            Array of length E holding the index of the node each arc arrives at
+        weights (ndarray):
+            Array of length E holding the weight of each arc, as float64 or float32. Distances are accumulated in
+            float64 either way
+        src (int):
+            Index of the source node
+        dst (int):
+            Index of the destination node, the search stops once its distance is final. Pass -1 to solve every node
+        dist (ndarray):
+            Array of length V, filled with the shortest distance from the source to each node, inf for nodes that
+            were not reached
+        pred (ndarray):
+            Array of length V, filled with the index of the predecessor of each node on its shortest path. The
+            source is its own predecessor, and unreached nodes have -1
+    ------------
+    Notes:
+        Compiled with Numba when it is installed. The priority queue is a binary min-heap held in a pair of
+        arrays, since Numba cannot efficiently run heapq over tuples, and uses lazy deletion in place of
+        decrease-key
+    """
+    dist[:] = inf
+    pred[:] = -1
+    dist[src] = 0.0
+    pred[src] = src
+
+    # binary min-heap of (distance, node index) pairs. Rather than decreasing the key of an existing entry, a new
+    # entry is pushed each time a distance improves and stale entries are skipped when popped. This needs no index
+    # of heap positions, and bounds the heap at one entry per arc plus the source
+    heap_d = np.empty(len(indices) + 1, dtype=np.float64)
+    heap_v = np.empty(len(indices) + 1, dtype=np.int32)
+    size = _heap_push(heap_d, heap_v, 0, 0.0, src)
+
+    while size > 0:
+        d, u = _heap_pop(heap_d, heap_v, size)
+        size -= 1
+
+        # an entry is only pushed when it strictly improves dist[u], so any entry that no longer matches it is stale
+        if d != dist[u]:
+            continue
+
+        # the destination's distance is final once it is popped
+        if u == dst:
+            break
+
+        # relax the out-arcs of u, which are stored contiguously. The distance to u is the popped d, so it is not
+        # read back from dist for each arc
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + weights[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                size = _heap_push(heap_d, heap_v, size, nd, v)
+
+
+@njit(['int32(int32[::1], int32[::1], float64[::1], int32[::1], int32[::1], float64[::1], int32, int32, '
+       'float64[::1], int32[::1], float64[::1], int32[::1])',
+       'int32(int32[::1], int32[::1], float32[::1], int32[::1], int32[::1], float32[::1], int32, int32, '
+       'float64[::1], int32[::1], float64[::1], int32[::1])'], cache=True)
+def _bidirectional_dijkstra_csr(indptr, indices, weights, indptr_rev, indices_rev, weights_rev, src, dst, dist, pred,
+                                dist_rev, succ):
+    """
+    performs bidirectional Dijkstra's shortest-path algorithm between two nodes of a network stored in CSR form,
+    searching forward from the source and backward from the destination until the two searches meet
+    ------------
+    Parameters:
+        indptr, indices, weights (ndarray):
+            CSR arrays of the out-arcs of each node, as for _dijkstra_csr
+        indptr_rev, indices_rev, weights_rev (ndarray):
+            CSR arrays of the in-arcs of each node, i.e. of the network with every arc reversed
+        src (int):
+            Index of the source node
+        dst (int):
+            Index of the destination node
+        dist, pred (ndarray):
+            Arrays of length V, filled with the distance from the source and predecessor index of each node found by
+            the forward search. The source is its own predecessor
+        dist_rev, succ (ndarray):
+            Arrays of length V, filled with the distance to the destination and successor index of each node found by
+            the backward search. The destination is its own successor
+    ------------
+    Return:
+        meet (int):
+            Index of a node on the shortest path, which is reached from the source by following pred and reaches the
+            destination by following succ. -1 if no path exists
+    """
+    dist[:] = inf
+    pred[:] = -1
+    dist_rev[:] = inf
+    succ[:] = -1
+    dist[src] = 0.0
+    pred[src] = src
+    dist_rev[dst] = 0.0
+    succ[dst] = dst
+
+    # length of the shortest path found so far, and the node at which the two searches joined to form it
+    best = inf
+    meet = -1
+    if src == dst:
+        best = 0.0
+        meet = src
+
+    # one binary min-heap for each search direction
+    heap_d = np.empty(len(indices) + 1, dtype=np.float64)
+    heap_v = np.empty(len(indices) + 1, dtype=np.int32)
+    size = _heap_push(heap_d, heap_v, 0, 0.0, src)
+    heap_d_rev = np.empty(len(indices) + 1, dtype=np.float64)
+    heap_v_rev = np.empty(len(indices) + 1, dtype=np.int32)
+    size_rev = _heap_push(heap_d_rev, heap_v_rev, 0, 0.0, dst)
+
+    # once either search runs out of nodes, every path between source and destination has been seen. Otherwise stop
+    # when no path through the unsettled nodes can be shorter than the best one already found
+    while size > 0 and size_rev > 0 and heap_d[0] + heap_d_rev[0] < best:
+        # advance whichever search has the closer frontier
+        if heap_d[0] <= heap_d_rev[0]:
+            d, u = _heap_pop(heap_d, heap_v, size)
+            size -= 1
+            if d != dist[u]:
+                continue
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                nd = d + weights[k]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    size = _heap_push(heap_d, heap_v, size, nd, v)
+                    if nd + dist_rev[v] < best:
+                        best = nd + dist_rev[v]
+                        meet = v
+        else:
+            d, u = _heap_pop(heap_d_rev, heap_v_rev, size_rev)
+            size_rev -= 1
+            if d != dist_rev[u]:
+                continue
+            for k in range(indptr_rev[u], indptr_rev[u + 1]):
+                v = indices_rev[k]
+                nd = d + weights_rev[k]
+                if nd < dist_rev[v]:
+                    dist_rev[v] = nd
+                    succ[v] = u
+                    size_rev = _heap_push(heap_d_rev, heap_v_rev, size_rev, nd, v)
+                    if nd + dist[v] < best:
+                        best = nd + dist[v]
+                        meet = v
+
+    return meet
+
+
+def _extract_path_idx(pred, idx_to_name, idx):
+    """
+    follows a chain of predecessor indices back to the source to generate a list of node names for the path
+    -------------
+    Parameters:
+        pred (ndarray):
+            Index of the predecessor of each node, with the source its own predecessor
+        idx_to_name (list):
+            Node name for each index
+        idx (int):
+            Index of the node at which the path ends
+    -------------
+    Return:
+        path (list):
+            List of node names for the path, starting with the source node name and ending with the name of the
+            node with index idx
+    """
+    path = []
 
-            # calculating the total distance from source node
-            dist_sum = temp_weight + temp_predecessor.value[0]
+    # follow the chain of predecessor indices back from the end node until the source, which is its own
+    # predecessor, is reached
+    while pred[idx] != idx:
+        path.append(idx_to_name[idx])
+        idx = pred[idx]
+    path.append(idx_to_name[idx])
 
-            # change the provisional distance and predecessor node if the new distance is smaller than current value
-            # compared_value
-            if dist_sum < temp_node.value[0]:
-                temp_node.value[0] = dist_sum
-                temp_node.value[1] = solved_node.name
+    # reverse the path, so it goes from start to end
+    path.reverse()
 
-        return solved_name
+    return path
 
 
 def spath_extract_path(network, destination_name):
@@ -67,28 +371,12 @@ def spath_extract_path(network, destination_name):
             node name
     --------------
     Notes:
-        Only valid if a solution was found for the shortest path
+        Only valid if a solution was found for the shortest path, using the predecessors stored in network.pred
     """
-    destination_node = network.get_node(destination_name)
-    path = []
+    return _extract_path_idx(network.pred, network.idx_to_name, network.name_to_idx[destination_name])
 
-    # follow a path through each node to find a chain of predecessors, starting with destination node
-    current_node = destination_node
-    while current_node.value[1] is not None:
-        predecessor_name = current_node.value[1]
-        predecessor_node = network.get_node(predecessor_name)
-        path.append(predecessor_name)
-        current_node = predecessor_node
 
-    # reverse the path, so it goes from start to destination
-    path.reverse()
-    # include the destination node in path
-    path.append(destination_name)
-
-    return path
-
-
-def spath_algorithm(network, source_name, destination_name):
+def spath_algorithm(network, source_name, destination_name, bidirectional=False):
     """
     performs Dijkstra's shortest-path algorithm
     ------------
@@ -99,6 +387,9 @@ def spath_algorithm(network, source_name, destination_name):
             The name of the source node
         destination_name (string):
             The name of the destination node
+        bidirectional (bool):
+            If True, search forward from the source and backward from the destination at the same time, which
+            typically settles far fewer nodes. Otherwise, search forward from the source only
     -------------
     Returns:
         distance (float or None):
@@ -106,32 +397,132 @@ def spath_algorithm(network, source_name, destination_name):
         path (list or None):
             List of node names for the shortest path, starting with the source node name and ending with the
             destination node name. If no solution was found, return None.
+    -------------
+    Raises:
+        KeyError:
+            If the source or destination node is not in the network
     """
-    # initialise the values for all nodes in the network
-    unvisited_set = spath_initialise(network, source_name)
-
-    solved_node_name = spath_iteration(network, unvisited_set)
-
-    # perform iterations of the shortest-path algorithm until the entire path is found
-    while solved_node_name != destination_name:
-        # if it cannot be solved, break out of the while loop
-        if solved_node_name is None:
-            break
-        solved_node_name = spath_iteration(network, unvisited_set)
+    # pack the network into arrays and solve from the source node
+    network.finalize()
+    for name in (source_name, destination_name):
+        if name not in network.name_to_idx:
+            raise KeyError(f"node {name!r} is not in the network")
+    source_idx = network.name_to_idx[source_name]
+    destination_idx = network.name_to_idx[destination_name]
+    if bidirectional:
+        meet_idx = _bidirectional_dijkstra_csr(network.indptr, network.indices, network.weights, network.indptr_rev,
+                                               network.indices_rev, network.weights_rev, source_idx, destination_idx,
+                                               network.dist, network.pred, network.dist_rev, network.succ)
+    elif (source_idx != destination_idx
+          and network.indptr_rev[destination_idx] == network.indptr_rev[destination_idx + 1]):
+        # no arcs arrive at the destination, so there is no need to search the source's whole component to find that
+        # it cannot be reached. The solution arrays are left as a search that settles only the source
+        network.dist[:] = inf
+        network.pred[:] = -1
+        network.dist[source_idx] = 0.0
+        network.pred[source_idx] = source_idx
+        meet_idx = -1
+    else:
+        # the search stops as soon as the destination is popped from the heap, when its distance is final. Use the
+        # fastest solver available: the compiled extension, then Numba, then SciPy, then plain Python. SciPy's solver
+        # is compiled but cannot stop at the destination, so it is preferred only over plain Python
+        if _dijkstra_csr_c is not None:
+            _dijkstra_csr_c(network.indptr, network.indices, network.weights, source_idx, destination_idx,
+                            network.dist, network.pred)
+        elif _HAVE_NUMBA:
+            _dijkstra_csr(network.indptr, network.indices, network.weights, source_idx, destination_idx,
+                          network.dist, network.pred)
+        elif _HAVE_SCIPY:
+            dist, pred = scipy.sparse.csgraph.dijkstra(network.to_scipy_csr(), indices=source_idx,
+                                                       return_predecessors=True)
+            network.dist[:] = dist
+            network.pred[:] = np.where(pred < 0, -1, pred)
+            network.pred[source_idx] = source_idx
+        else:
+            network.finalize_adj()
+            network.dist[:], network.pred[:] = _dijkstra_adj(network.adj, source_idx, destination_idx)
+        meet_idx = destination_idx if network.dist[destination_idx] != inf else -1
 
     # if it cannot be solved, both the distance and path are set to None to be returned
-    if solved_node_name is None:
+    if meet_idx == -1:
         distance = None
         path = None
+    elif bidirectional:
+        # returning the values for distance and path assuming a solution was found, joining the forward path to the
+        # meeting node with the chain of successors from there to the destination
+        idx_to_name = network.idx_to_name
+        succ = network.succ
+        distance = float(network.dist[meet_idx] + network.dist_rev[meet_idx])
+        path = _extract_path_idx(network.pred, idx_to_name, meet_idx)
+        idx = meet_idx
+        while succ[idx] != idx:
+            idx = succ[idx]
+            path.append(idx_to_name[idx])
     else:
         # returning the values for distance and path assuming a solution was found
-        destination_node = network.get_node(destination_name)
-        distance = destination_node.value[0]
-        path = spath_extract_path(network, destination_name)
+        distance = float(network.dist[destination_idx])
+        path = _extract_path_idx(network.pred, network.idx_to_name, destination_idx)
 
     return distance, path
 
 
+# per-process state of a spath_batch worker: the network rebuilt around the shared CSR arrays, and the shared memory
+# blocks that back them, which must stay open while the arrays are in use
+_batch_network = None
+_batch_blocks = None
+
+
+def _batch_init(array_specs, idx_to_name, name_to_idx):
+    """
+    initialises a spath_batch worker process, attaching to the shared CSR arrays and wrapping them in a Network
+    ------------
+    Parameters:
+        array_specs (dict):
+            For each CSR array attribute name, a (shared memory block name, shape, dtype) tuple
+        idx_to_name (list):
+            Node name for each index in the CSR arrays
+        name_to_idx (dict):
+            Index in the CSR arrays of each node name
+    """
+    global _batch_network, _batch_blocks
+
+    # the network has no Node or Arc objects, only the arrays the solvers read
+    network = Network()
+    _batch_blocks = []
+    for attr, (block_name, shape, dtype) in array_specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _batch_blocks.append(block)
+        setattr(network, attr, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+    network.idx_to_name = idx_to_name
+    network.name_to_idx = name_to_idx
+
+    # per-process solution arrays, and mark the CSR arrays as current so that spath_algorithm does not rebuild them
+    network.dist = np.full(len(idx_to_name), inf, dtype=np.float64)
+    network.pred = np.full(len(idx_to_name), -1, dtype=np.int32)
+    network.dist_rev = np.full(len(idx_to_name), inf, dtype=np.float64)
+    network.succ = np.full(len(idx_to_name), -1, dtype=np.int32)
+    network._cached_csr = True
+    _batch_network = network
+
+
+def _batch_query(query):
+    """
+    solves one spath_batch query in a worker process
+    ------------
+    Parameters:
+        query (tuple):
+            (position, source name, destination name, bidirectional) for the query
+    ------------
+    Return:
+        position (int):
+            Position of the query in the batch, as results arrive out of order
+        result (tuple):
+            (distance, path) as returned by spath_algorithm
+    """
+    position, source_name, destination_name, bidirectional = query
+    return position, spath_algorithm(_batch_network, source_name, destination_name, bidirectional)
+
+
 class Node(object):
     """
     Object representing network node.
@@ -143,15 +534,18 @@ class Node(object):
     value : float, int, bool, str, list, etc...
         information associated with the node.
     arcs_in : list
-        Arc objects that end at this node.
+        Arc objects that end at this node. Only filled in by a Network that tracks in-arcs.
     arcs_out : list
         Arc objects that begin at this node.
+    index : int or None
+        Position of the node in the nodes list of its Network, set by Network.add_node and Network.finalize.
     """
 
     def __init__(self, name=None, value=None, arcs_in=None, arcs_out=None):
 
         self.name = name
         self.value = value
+        self.index = None
         if arcs_in is None:
             self.arcs_in = []
         if arcs_out is None:
@@ -168,7 +562,8 @@ class Arc(object):
     Attributes:
     -----------
     weight : int, float
-        information associated with the arc.
+        information associated with the arc. Setting it marks the arrays of the Network the arc was added to as out
+        of date, so the next query rebuilds them.
     to_node : Node
         Node object (defined above) at which arc ends.
     from_node : Node
@@ -176,10 +571,23 @@ class Arc(object):
     """
 
     def __init__(self, weight=None, from_node=None, to_node=None):
+        # Network the arc was added to, set by Network.add_arc
+        self._network = None
         self.weight = weight
         self.from_node = from_node
         self.to_node = to_node
 
+    @property
+    def weight(self):
+        return self._weight
+
+    @weight.setter
+    def weight(self, weight):
+        self._weight = weight
+        # the network's CSR arrays hold a copy of the weight
+        if self._network is not None:
+            self._network._cached_csr = False
+
     def __repr__(self):
         return f"arc:({self.from_node.name})--{self.weight}-->({self.to_node.name})"
 
@@ -194,13 +602,47 @@ class Network(object):
         A list of all Node (defined above) objects in the network.
     arcs : list
         A list of all Arc (defined above) objects in the network.
+    indptr, indices, weights : ndarray
+        Compressed sparse row (CSR) form of the arcs, set by finalize(). The out-arcs of the node with index i
+        arrive at nodes indices[indptr[i]:indptr[i+1]] with weights weights[indptr[i]:indptr[i+1]].
+    indptr_rev, indices_rev, weights_rev : ndarray
+        CSR form of the arcs grouped by the node they arrive at, set by finalize(). Used by the backward half of the
+        bidirectional search.
+    name_to_idx : dict
+        Index of each node name in the CSR arrays, set by finalize().
+    idx_to_name : list
+        Node name for each index in the CSR arrays, set by finalize().
+    adj : tuple or None
+        For each node index, a tuple of (node index, weight) pairs for the arcs departing it, set by finalize_adj().
+    dist, pred : ndarray
+        Distance from the source to, and predecessor index of, each node reached by the last call to spath_algorithm
+        (by its forward search, if bidirectional). The search stops once the destination is solved, so distances are
+        only final for the nodes it settled before stopping, and inf and -1 mark nodes it did not reach. Allocated by
+        finalize().
+    dist_rev, succ : ndarray
+        Distance to the destination from, and successor index of, each node reached by the backward search of the
+        last bidirectional call to spath_algorithm. Not written by forward-only calls. Allocated by finalize().
+    weight_dtype : numpy dtype
+        Precision of the weights and weights_rev arrays, float64 (default) or float32. float32 halves the memory
+        traffic of reading weights in large networks, where its 7 significant digits are enough for the arc weights.
+    track_in_edges : bool
+        Whether add_arc records each arc in the arcs_in list of the node it arrives at (default False). The solvers
+        never read arcs_in, so this is off unless needed elsewhere.
     """
 
-    def __init__(self, nodes=None, arcs=None):
+    def __init__(self, nodes=None, arcs=None, weight_dtype=np.float64, track_in_edges=False):
         if nodes is None:
             self.nodes = []
         if arcs is None:
             self.arcs = []
+        self.weight_dtype = weight_dtype
+        self.track_in_edges = track_in_edges
+        # lookup of node name to Node object, kept in step with self.nodes by add_node
+        self._node_index = {}
+        # whether the CSR arrays are up to date with the nodes and arcs, and the solver inputs derived from them
+        self._cached_csr = False
+        self._cached_scipy_csr = None
+        self.adj = None
 
     def __repr__(self):
         node_names = '\n'.join(node.__repr__() for node in self.nodes)
@@ -221,13 +663,7 @@ class Network(object):
         node : Node, or None
             Node object (as defined above) with corresponding name, or None if not found.
         """
-        # loop through list of nodes until node found
-        for node in self.nodes:
-            if node.name == name:
-                return node
-
-        # if node not found, return None
-        return None
+        return self._node_index.get(name)
 
     def add_node(self, name, value=None):
         """
@@ -239,10 +675,21 @@ class Network(object):
             Name of the node to be added.
         value : float, int, str, etc...
             Optional value to set for node.
+
+        Returns
+        -------
+        new_node : Node
+            The Node object that was added.
         """
         # create node and add it to the network
         new_node = Node(name, value)
+        new_node.index = len(self.nodes)
         self.nodes.append(new_node)
+        # if the name is already in use, keep looking up the first node with it, as a scan of self.nodes would
+        self._node_index.setdefault(name, new_node)
+        self._cached_csr = False
+
+        return new_node
 
     def add_arc(self, node_from, node_to, weight):
         """
@@ -259,11 +706,14 @@ class Network(object):
         """
         # create the arc and add it to the network
         new_arc = Arc(weight, node_from, node_to)
+        new_arc._network = self
         self.arcs.append(new_arc)
+        self._cached_csr = False
 
         # update the connected nodes to include arc information
         node_from.arcs_out.append(new_arc)
-        node_to.arcs_in.append(new_arc)
+        if self.track_in_edges:
+            node_to.arcs_in.append(new_arc)
 
     def read_network(self, filename):
         """
@@ -276,38 +726,220 @@ class Network(object):
         """
         with open(filename, 'r') as file:
 
-            # get first line in file
-            line = file.readline()
-
-            # check for end of file, terminate if found
-            while line != '':
+            # iterate over each line until end of file
+            for line in file:
                 items = line.strip().split(',')
 
-                # create source node if it doesn't already exist
-                if self.get_node(items[0]) is None:
-                    self.add_node(items[0])
+                # get starting node for this line, creating it if it doesn't already exist
+                source_node = self._node_index.get(items[0]) or self.add_node(items[0])
 
-                # get starting node for this line
-                source_node = self.get_node(items[0])
-
-                for item in items:
-
-                    # initial item ignored as it has no arc
-                    if item == source_node.name:
-                        continue
+                # initial item ignored as it has no arc
+                for item in items[1:]:
 
                     # separate out to destination node name and arc weight
-                    data = item.split(';')
-                    destination_node = data[0]
-                    arc_weight = data[1]
+                    destination_name, arc_weight = item.split(';', 1)
 
-                    # Create destination node if not already in network, then obtain the node itself
-                    if self.get_node(destination_node) is None:
-                        self.add_node(destination_node)
-                    destination_node = self.get_node(destination_node)
+                    # obtain the destination node, creating it if not already in network
+                    destination_node = self._node_index.get(destination_name) or self.add_node(destination_name)
 
                     # Add arc from source to destination node, with associated weight
                     self.add_arc(source_node, destination_node, float(arc_weight))
 
-                # get next line in file
-                line = file.readline()
\ No newline at end of file
+    def finalize(self, force=False):
+        """
+        Packs the nodes and arcs of the Network into CSR arrays for the shortest-path solver.
+
+        Nodes are indexed in the order they appear in self.nodes, and arcs are grouped by the node they depart from
+        so that the out-arcs of each node occupy a contiguous block of the indices and weights arrays. Within each
+        block, arcs are sorted by the node they arrive at, so relaxing them reads the solver's per-node arrays in
+        increasing address order.
+
+        The arrays are kept between calls, and only rebuilt once add_node, add_arc or setting the weight of an arc
+        has changed the Network, so that repeated queries on the same Network share them.
+
+        Parameters
+        ----------
+        force : bool
+            Rebuild the arrays even if the Network has not changed through add_node, add_arc or an arc weight, e.g.
+            after appending Node or Arc objects to the nodes or arcs lists directly. Nodes are indexed by their
+            position in the nodes list on every rebuild.
+
+        Raises
+        ------
+        ValueError
+            If any arc has a negative weight, for which Dijkstra's algorithm is not valid.
+        """
+        if self._cached_csr and not force:
+            return
+        self._cached_csr = False
+
+        # index the nodes by their position in self.nodes, which also covers nodes not added through add_node. Names
+        # look up the first node with that name, as for get_node
+        self._node_index = {}
+        for idx, node in enumerate(self.nodes):
+            node.index = idx
+            self._node_index.setdefault(node.name, node)
+        self.idx_to_name = [node.name for node in self.nodes]
+        self.name_to_idx = {name: node.index for name, node in self._node_index.items()}
+        n_nodes = len(self.idx_to_name)
+        n_arcs = len(self.arcs)
+
+        # endpoints and weight of each arc, in the order the arcs were added. Node indices are read straight from the
+        # nodes rather than looked up by name
+        from_idx = np.fromiter((arc.from_node.index for arc in self.arcs), np.int32, n_arcs)
+        to_idx = np.fromiter((arc.to_node.index for arc in self.arcs), np.int32, n_arcs)
+        weights = np.fromiter((arc.weight for arc in self.arcs), self.weight_dtype, n_arcs)
+
+        # the solvers size their heaps assuming no distance can decrease once settled, so a negative weight would
+        # overrun them rather than just give a wrong answer
+        negative = np.flatnonzero(weights < 0)
+        if len(negative) > 0:
+            raise ValueError(f"arc weights must not be negative, found {self.arcs[negative[0]]!r}")
+
+        # group the arcs by departing node for the forward search, and by arriving node for the backward search
+        self.indptr, self.indices, self.weights = self._build_csr(from_idx, to_idx, weights, n_nodes)
+        self.indptr_rev, self.indices_rev, self.weights_rev = self._build_csr(to_idx, from_idx, weights, n_nodes)
+
+        # per-node solution arrays, filled in by the shortest-path solver
+        self.dist = np.full(n_nodes, inf, dtype=np.float64)
+        self.pred = np.full(n_nodes, -1, dtype=np.int32)
+        self.dist_rev = np.full(n_nodes, inf, dtype=np.float64)
+        self.succ = np.full(n_nodes, -1, dtype=np.int32)
+
+        # solver inputs derived from the previous arrays are rebuilt on demand
+        self._cached_scipy_csr = None
+        self.adj = None
+        self._cached_csr = True
+
+    def to_scipy_csr(self):
+        """
+        Returns the CSR arrays of the Network as a SciPy sparse matrix, for use with scipy.sparse.csgraph.
+
+        Calls finalize() first. Where several arcs join the same pair of nodes, only the lightest is kept, as a
+        sparse matrix with duplicate entries sums them. Arcs with zero weight are kept as explicitly stored entries,
+        which csgraph treats as arcs. The matrix is reused until the CSR arrays are next rebuilt.
+
+        Returns
+        -------
+        matrix : scipy.sparse.csr_matrix
+            V by V float64 matrix whose entry (i, j) is the weight of the lightest arc from the node with index i to
+            that with index j.
+        """
+        if not _HAVE_SCIPY:
+            raise ImportError("SciPy is required to convert the network to a SciPy sparse matrix")
+
+        self.finalize()
+        if self._cached_scipy_csr is None:
+            n_nodes = len(self.idx_to_name)
+
+            # each row is sorted by column, so parallel arcs form runs of equal (row, column). Find where each run
+            # starts, and keep the minimum weight of each run
+            rows = np.repeat(np.arange(n_nodes, dtype=np.int32), np.diff(self.indptr))
+            run_start = np.ones(len(self.indices), dtype=bool)
+            run_start[1:] = (rows[1:] != rows[:-1]) | (self.indices[1:] != self.indices[:-1])
+            starts = np.flatnonzero(run_start)
+            weights = np.minimum.reduceat(self.weights.astype(np.float64), starts)
+            indices = self.indices[starts]
+            indptr = np.searchsorted(starts, self.indptr).astype(np.int32)
+
+            self._cached_scipy_csr = scipy.sparse.csr_matrix((weights, indices, indptr), shape=(n_nodes, n_nodes))
+
+        return self._cached_scipy_csr
+
+    def finalize_adj(self):
+        """
+        Freezes the out-arcs of each node into a tuple of (node index, weight) pairs, for the plain Python solver.
+
+        Must be called after finalize(), from whose CSR arrays the pairs are built. The pairs are reused until the
+        CSR arrays are next rebuilt.
+        """
+        if self.adj is not None:
+            return
+
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        weights = self.weights.tolist()
+        self.adj = tuple(tuple(zip(indices[start:end], weights[start:end]))
+                         for start, end in zip(indptr[:-1], indptr[1:]))
+
+    def spath_batch(self, pairs, bidirectional=False, processes=None):
+        """
+        Solves many shortest-path queries on the Network in parallel across worker processes.
+
+        The CSR arrays are built once and placed in shared memory, which every worker reads without copying or
+        locking since the arrays are never modified.
+
+        Parameters
+        ----------
+        pairs : list
+            (source name, destination name) tuples, one per query.
+        bidirectional : bool
+            Whether to solve each query with the bidirectional search, as for spath_algorithm.
+        processes : int or None
+            Number of worker processes, default one per CPU. Never more than the number of queries.
+
+        Returns
+        -------
+        results : list
+            (distance, path) tuples as returned by spath_algorithm, in the same order as pairs.
+        """
+        # results arrive in whatever order the queries finish, so each carries its position in pairs
+        queries = [(position, source, destination, bidirectional)
+                   for position, (source, destination) in enumerate(pairs)]
+        if not queries:
+            return []
+        processes = min(processes or os.cpu_count() or 1, len(queries))
+        self.finalize()
+
+        # copy each CSR array into a block of shared memory. Blocks cannot be empty, so a network with no arcs still
+        # allocates one byte
+        array_names = ['indptr', 'indices', 'weights', 'indptr_rev', 'indices_rev', 'weights_rev']
+        blocks = []
+        array_specs = {}
+        try:
+            for attr in array_names:
+                array = getattr(self, attr)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+                array_specs[attr] = (block.name, array.shape, array.dtype)
+
+            results = [None] * len(queries)
+            chunksize = max(1, len(queries) // (4 * processes))
+            with multiprocessing.Pool(processes, _batch_init,
+                                      (array_specs, self.idx_to_name, self.name_to_idx)) as pool:
+                for position, result in pool.imap_unordered(_batch_query, queries, chunksize):
+                    results[position] = result
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        return results
+
+    @staticmethod
+    def _build_csr(row_idx, col_idx, weights, n_nodes):
+        """
+        Groups arcs into CSR arrays by row node, sorting the arcs within each row by column node.
+
+        Parameters
+        ----------
+        row_idx : ndarray
+            Index of the node each arc is grouped under.
+        col_idx : ndarray
+            Index of the node at the other end of each arc.
+        weights : ndarray
+            Weight of each arc.
+        n_nodes : int
+            Number of nodes in the network.
+
+        Returns
+        -------
+        indptr, indices, weights : ndarray
+            The CSR arrays.
+        """
+        order = np.lexsort((col_idx, row_idx))
+        indptr = np.zeros(n_nodes + 1, dtype=np.int32)
+        np.cumsum(np.bincount(row_idx, minlength=n_nodes), out=indptr[1:])
+
+        return indptr, col_idx[order], weights[order]
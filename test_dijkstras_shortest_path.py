@@ -0,0 +1,336 @@
+# imports
+import heapq
+import random
+from math import inf
+
+import numpy as np
+import pytest
+
+import dijkstras_shortest_path as dsp
+
+
+def reference_distances(arcs, source_name):
+    """
+    solves every distance from the source with a textbook heapq Dijkstra's over a list of (from, to, weight) arcs
+    """
+    adjacency = {}
+    for from_name, to_name, weight in arcs:
+        adjacency.setdefault(from_name, []).append((to_name, weight))
+
+    dist = {source_name: 0.0}
+    heap = [(0.0, source_name)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for v, w in adjacency.get(u, []):
+            if d + w < dist.get(v, inf):
+                dist[v] = d + w
+                heapq.heappush(heap, (d + w, v))
+
+    return dist
+
+
+def random_network(seed, weight_dtype=np.float64):
+    """
+    builds a random Network, with zero weights, parallel arcs, self-loops and unreachable nodes all likely
+    """
+    rng = random.Random(seed)
+    n_nodes = rng.randint(1, 30)
+    network = dsp.Network(weight_dtype=weight_dtype)
+    nodes = [network.add_node(f"n{i}") for i in range(n_nodes)]
+    arcs = []
+    for _ in range(rng.randint(0, 3 * n_nodes)):
+        from_node, to_node = rng.choice(nodes), rng.choice(nodes)
+        weight = rng.choice([0.0, float(rng.randint(1, 9)), round(rng.uniform(0, 5), 2)])
+        network.add_arc(from_node, to_node, weight)
+        arcs.append((from_node.name, to_node.name, weight))
+
+        # repeat some arcs with a different weight
+        if rng.random() < 0.2:
+            network.add_arc(from_node, to_node, weight + 1.0)
+            arcs.append((from_node.name, to_node.name, weight + 1.0))
+
+    return network, arcs
+
+
+def random_queries(network, seed, n_queries=10):
+    """
+    picks random (source name, destination name) queries, plus one from the first node to itself
+    """
+    rng = random.Random(seed)
+    names = [node.name for node in network.nodes]
+    queries = [(rng.choice(names), rng.choice(names)) for _ in range(n_queries)]
+    queries.append((names[0], names[0]))
+
+    return queries
+
+
+def check_result(arcs, source_name, destination_name, distance, path):
+    """
+    asserts that (distance, path) is a shortest path from the source to the destination, or no path if unreachable
+    """
+    expected = reference_distances(arcs, source_name).get(destination_name)
+    if expected is None:
+        assert distance is None and path is None
+        return
+
+    assert distance == pytest.approx(expected)
+    assert path[0] == source_name and path[-1] == destination_name
+
+    # the path must follow arcs of the network whose lightest weights sum to the distance
+    lightest = {}
+    for from_name, to_name, weight in arcs:
+        lightest[from_name, to_name] = min(weight, lightest.get((from_name, to_name), inf))
+    assert sum(lightest[step] for step in zip(path[:-1], path[1:])) == pytest.approx(expected)
+
+
+@pytest.fixture(params=['cython', 'numba', 'scipy', 'python'])
+def backend(request, monkeypatch):
+    """
+    restricts the forward search of spath_algorithm to a single solver, skipping solvers that are not installed
+    """
+    available = {
+        'cython': dsp._dijkstra_csr_c is not None,
+        'numba': dsp._HAVE_NUMBA,
+        'scipy': dsp._HAVE_SCIPY,
+        'python': True,
+    }
+    if not available[request.param]:
+        pytest.skip(f"{request.param} solver is not available")
+
+    # each solver is only used when those preferred over it are unavailable
+    preference = ['cython', 'numba', 'scipy', 'python']
+    preferred = preference[:preference.index(request.param)]
+    if 'cython' in preferred:
+        monkeypatch.setattr(dsp, '_dijkstra_csr_c', None)
+    if 'numba' in preferred:
+        monkeypatch.setattr(dsp, '_HAVE_NUMBA', False)
+    if 'scipy' in preferred:
+        monkeypatch.setattr(dsp, '_HAVE_SCIPY', False)
+
+    return request.param
+
+
+@pytest.mark.parametrize('seed', range(25))
+def test_forward_matches_reference(backend, seed):
+    network, arcs = random_network(seed)
+    for source_name, destination_name in random_queries(network, seed):
+        distance, path = dsp.spath_algorithm(network, source_name, destination_name)
+        check_result(arcs, source_name, destination_name, distance, path)
+
+
+@pytest.mark.parametrize('seed', range(25))
+def test_bidirectional_matches_reference(seed):
+    network, arcs = random_network(seed)
+    for source_name, destination_name in random_queries(network, seed):
+        distance, path = dsp.spath_algorithm(network, source_name, destination_name, bidirectional=True)
+        check_result(arcs, source_name, destination_name, distance, path)
+
+
+def test_duplicate_node_name_keeps_first_node():
+    network = dsp.Network()
+    first = network.add_node('A')
+    destination = network.add_node('B')
+    network.add_node('A')
+    network.add_arc(first, destination, 2.0)
+
+    assert network.get_node('A') is first
+    assert dsp.spath_algorithm(network, 'A', 'B') == (2.0, ['A', 'B'])
+
+
+@pytest.mark.parametrize('bidirectional', [False, True])
+def test_path_through_second_node_with_duplicate_name(bidirectional):
+    network = dsp.Network()
+    node_a = network.add_node('A')
+    network.add_node('X')
+    second_x = network.add_node('X')
+    node_b = network.add_node('B')
+    network.add_arc(node_a, second_x, 1.0)
+    network.add_arc(second_x, node_b, 1.0)
+
+    assert dsp.spath_algorithm(network, 'A', 'B', bidirectional) == (2.0, ['A', 'X', 'B'])
+
+
+@pytest.mark.parametrize('bidirectional', [False, True])
+def test_negative_weight_is_rejected(backend, bidirectional):
+    network = dsp.Network()
+    node_a = network.add_node('A')
+    node_b = network.add_node('B')
+    network.add_arc(node_a, node_b, 1.0)
+    network.add_arc(node_b, node_a, -2.0)
+
+    with pytest.raises(ValueError, match='negative'):
+        dsp.spath_algorithm(network, 'A', 'B', bidirectional=bidirectional)
+
+
+def test_unreachable_destination_resets_solution_arrays():
+    network = dsp.Network()
+    node_a = network.add_node('A')
+    node_b = network.add_node('B')
+    network.add_node('C')
+    network.add_arc(node_a, node_b, 1.0)
+    assert dsp.spath_algorithm(network, 'A', 'B') == (1.0, ['A', 'B'])
+
+    # no arcs arrive at C, so the search is skipped, but the arrays must not keep the previous query's results
+    assert dsp.spath_algorithm(network, 'A', 'C') == (None, None)
+    assert network.dist.tolist() == [0.0, inf, inf]
+    assert network.pred.tolist() == [0, -1, -1]
+
+
+@pytest.mark.parametrize('bidirectional', [False, True])
+def test_unknown_node_raises_key_error(bidirectional):
+    network = dsp.Network()
+    network.add_node('A')
+
+    with pytest.raises(KeyError, match='Z'):
+        dsp.spath_algorithm(network, 'A', 'Z', bidirectional=bidirectional)
+    with pytest.raises(KeyError, match='Z'):
+        dsp.spath_algorithm(network, 'Z', 'A', bidirectional=bidirectional)
+
+
+@pytest.mark.parametrize('weight_dtype', [np.float64, np.float32])
+def test_parallel_arcs_use_lightest(backend, weight_dtype):
+    network = dsp.Network(weight_dtype=weight_dtype)
+    node_a = network.add_node('A')
+    node_b = network.add_node('B')
+    network.add_arc(node_a, node_b, 5.0)
+    network.add_arc(node_a, node_b, 1.0)
+
+    assert dsp.spath_algorithm(network, 'A', 'B') == (1.0, ['A', 'B'])
+
+
+@pytest.mark.skipif(not dsp._HAVE_SCIPY, reason="SciPy is not installed")
+@pytest.mark.parametrize('weight_dtype', [np.float64, np.float32])
+def test_to_scipy_csr_keeps_lightest_parallel_arc(weight_dtype):
+    network = dsp.Network(weight_dtype=weight_dtype)
+    node_a = network.add_node('A')
+    node_b = network.add_node('B')
+    network.add_node('C')
+    network.add_arc(node_a, node_b, 5.0)
+    network.add_arc(node_a, node_b, 1.0)
+    network.add_arc(node_b, node_a, 0.0)
+
+    matrix = network.to_scipy_csr()
+    assert matrix.dtype == np.float64
+    assert matrix.nnz == 2
+    assert matrix.toarray().tolist() == [[0.0, 1.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+
+
+@pytest.mark.parametrize('bidirectional', [False, True])
+def test_changed_arc_weight_is_used(backend, bidirectional):
+    network = dsp.Network()
+    node_a = network.add_node('A')
+    node_b = network.add_node('B')
+    node_c = network.add_node('C')
+    network.add_arc(node_a, node_c, 5.0)
+    network.add_arc(node_a, node_b, 1.0)
+    network.add_arc(node_b, node_c, 1.0)
+    assert dsp.spath_algorithm(network, 'A', 'C', bidirectional) == (2.0, ['A', 'B', 'C'])
+
+    network.arcs[0].weight = 0.5
+    assert dsp.spath_algorithm(network, 'A', 'C', bidirectional) == (0.5, ['A', 'C'])
+
+
+def test_node_appended_directly_is_indexed():
+    network = dsp.Network()
+    node_a = network.add_node('A')
+    node_b = dsp.Node('B')
+    network.nodes.append(node_b)
+    network.add_arc(node_a, node_b, 1.5)
+
+    assert dsp.spath_algorithm(network, 'A', 'B') == (1.5, ['A', 'B'])
+    assert node_b.index == 1
+    assert network.get_node('B') is node_b
+
+
+def test_finalize_force_picks_up_direct_list_edits():
+    network = dsp.Network()
+    node_a = network.add_node('A')
+    node_b = network.add_node('B')
+    network.add_arc(node_a, node_b, 1.0)
+    assert dsp.spath_algorithm(network, 'A', 'B') == (1.0, ['A', 'B'])
+
+    # neither edit goes through add_node or add_arc, so the cached arrays are only rebuilt when forced
+    node_c = dsp.Node('C')
+    network.nodes.append(node_c)
+    network.arcs.append(dsp.Arc(2.0, node_b, node_c))
+    node_b.arcs_out.append(network.arcs[-1])
+    network.finalize(force=True)
+
+    assert dsp.spath_algorithm(network, 'A', 'C') == (3.0, ['A', 'B', 'C'])
+
+
+def test_read_network(tmp_path):
+    filename = tmp_path / 'network.txt'
+    filename.write_text('A,B;1.5,C;2\nB,C;0.25,D;4\nC\n')
+    network = dsp.Network()
+    network.read_network(str(filename))
+
+    # D only appears as a destination, and C's line has no arcs
+    assert [node.name for node in network.nodes] == ['A', 'B', 'C', 'D']
+    assert [(arc.from_node.name, arc.to_node.name, arc.weight) for arc in network.arcs] == [
+        ('A', 'B', 1.5), ('A', 'C', 2.0), ('B', 'C', 0.25), ('B', 'D', 4.0)]
+    assert [arc.to_node.name for arc in network.get_node('A').arcs_out] == ['B', 'C']
+    assert network.get_node('D').arcs_out == []
+
+
+@pytest.mark.parametrize('track_in_edges', [False, True])
+def test_track_in_edges(track_in_edges):
+    network = dsp.Network(track_in_edges=track_in_edges)
+    node_a = network.add_node('A')
+    node_b = network.add_node('B')
+    network.add_arc(node_a, node_b, 1.0)
+
+    assert node_a.arcs_out == network.arcs
+    assert node_a.arcs_in == []
+    assert node_b.arcs_in == (network.arcs if track_in_edges else [])
+
+
+@pytest.mark.parametrize('bidirectional', [False, True])
+@pytest.mark.parametrize('seed', range(25))
+def test_float32_weights_match_reference(backend, seed, bidirectional):
+    network, arcs = random_network(seed, np.float32)
+    assert network.weight_dtype == np.float32
+    for source_name, destination_name in random_queries(network, seed):
+        distance, path = dsp.spath_algorithm(network, source_name, destination_name, bidirectional)
+        check_result(arcs, source_name, destination_name, distance, path)
+    assert network.weights.dtype == np.float32 and network.weights_rev.dtype == np.float32
+    assert network.dist.dtype == np.float64
+
+
+@pytest.mark.parametrize('bidirectional', [False, True])
+def test_spath_batch_matches_reference(bidirectional):
+    network, arcs = random_network(7)
+    queries = random_queries(network, 7, n_queries=30)
+    results = network.spath_batch(queries, bidirectional=bidirectional, processes=2)
+    assert len(results) == len(queries)
+    for (source_name, destination_name), (distance, path) in zip(queries, results):
+        check_result(arcs, source_name, destination_name, distance, path)
+
+
+def test_spath_batch_empty_starts_no_pool(monkeypatch):
+    network, _ = random_network(7)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no worker pool should be started for an empty batch")
+
+    monkeypatch.setattr(dsp.multiprocessing, 'Pool', no_pool)
+    assert network.spath_batch([]) == []
+
+
+def test_spath_batch_caps_processes_at_queries(monkeypatch):
+    network, arcs = random_network(7)
+    started = []
+    pool = dsp.multiprocessing.Pool
+
+    def recording_pool(processes, *args, **kwargs):
+        started.append(processes)
+        return pool(processes, *args, **kwargs)
+
+    monkeypatch.setattr(dsp.multiprocessing, 'Pool', recording_pool)
+    queries = random_queries(network, 7, n_queries=1)
+    results = network.spath_batch(queries, processes=8)
+    assert started == [len(queries)]
+    for (source_name, destination_name), (distance, path) in zip(queries, results):
+        check_result(arcs, source_name, destination_name, distance, path)